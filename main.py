@@ -1,111 +1,201 @@
+import asyncio
+import re
 import sys
 from pathlib import Path
+
+try:
+    import readline  # noqa: F401  (line editing and history for input())
+except ImportError:  # not available on Windows
+    pass
+
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-print("🍕 MISSION-PIZZA: STEP-BY-STEP ORDERING")
-print("=" * 60)
-print("📋 Follow numbered steps 1→2→3→4")
-print("📋 Pizza API server must be running")
-print("-" * 60)
-
-from pizza_mcp_server import PizzaMCPServerFactory, execute_mcp_tool
-server, _ = PizzaMCPServerFactory.create_server()
-
-menu_cache = execute_mcp_tool(server, "listPizzas", {})
-
-def show_menu():
-    print("\n🍕 CHOOSE PIZZA:")
-    print("-" * 30)
-    for pizza in menu_cache:
-        print(f"  {pizza['id']}. {pizza['name']} - ₹{pizza['price']}")
-    print("-" * 30)
-
-current_step = 1
-order_details = {}
-
-print("\n🤖 **STEP 1/4: Choose Pizza**")
-print("   Say: 'menu' then pizza number (1-5)")
-while True:
-    user_input = input("\n👤 You: ").strip().lower()
-    
-    if user_input in ['quit', 'exit', 'q']:
-        print("🤖 Thanks! 🍕")
-        break
-    
+from log_config import configure_logging
+from pizza_mcp_server import PizzaMCPServerFactory, execute_mcp_tool_async
+
+SIZE_MAP = {'s': 'small', 'm': 'medium', 'l': 'large'}
+QUIT = frozenset(('quit', 'exit', 'q'))
+SEPARATOR = "-" * 60
+PROMPT = "\n👤 You: "
+
+
+# Input token classes; anything that matches none of these is "text"
+TOKEN_RE = re.compile(
+    r"(?P<num>[1-5])"
+    r"|(?P<size>s|m|l|small|medium|large)"
+    r"|(?P<menu>.*menu.*)"
+)
+
+
+# What int() accepts once the input is stripped, e.g. "3", "03", "+3", "-1"
+NUMBER_RE = re.compile(r"[+-]?\d+")
+
+# Steps that take a number (pizza id, quantity)
+NUMERIC_STEPS = frozenset((1, 3))
+
+
+def classify(user_input, step):
+    # Numbers are matched in canonical form, so "03" counts as "3"
+    if step in NUMERIC_STEPS and NUMBER_RE.fullmatch(user_input):
+        user_input = str(int(user_input))
+    match = TOKEN_RE.fullmatch(user_input)
+    return match.lastgroup if match else "text"
+
+
+class OrderSession:
+    """State of the step-by-step order being built in the REPL."""
+
+    def __init__(self, server, menu_cache):
+        self.server = server
+        self.menu_cache = menu_cache
+        self.menu_by_id = {pizza["id"]: pizza for pizza in menu_cache}
+        self.current_step = 1
+        self.order_details = {}
+
     # STEP 1: Pizza selection
-    if current_step == 1:
-        if 'menu' in user_input:
-            show_menu()
+    async def show_menu(self, user_input):
+        print("\n🍕 CHOOSE PIZZA:")
+        print("-" * 30)
+        for pizza in self.menu_cache:
+            print(f"  {pizza['id']}. {pizza['name']} - ₹{pizza['price']}")
+        print("-" * 30)
+
+    async def pick_pizza(self, user_input):
+        pizza_id = int(user_input)
+        pizza_name = self.menu_by_id[pizza_id]["name"]
+        self.order_details["pizza_id"] = pizza_id
+        self.order_details["pizza_name"] = pizza_name
+        self.current_step = 2
+        print(f"\n✅ **{pizza_name}** selected!")
+        print("\n🤖 **STEP 2/4: Choose Size**")
+        print("   Say: s=small, m=medium, l=large")
+
+    async def reject_pizza(self, user_input):
+        if NUMBER_RE.fullmatch(user_input):
+            print("❌ Pizza 1-5 only!")
         else:
-            try:
-                pizza_id = int(user_input)
-                if 1 <= pizza_id <= 5:
-                    pizza_name = next(p["name"] for p in menu_cache if p["id"] == pizza_id)
-                    order_details["pizza_id"] = pizza_id
-                    order_details["pizza_name"] = pizza_name
-                    current_step = 2
-                    print(f"\n✅ **{pizza_name}** selected!")
-                    print("\n🤖 **STEP 2/4: Choose Size**")
-                    print("   Say: s=small, m=medium, l=large")
-                else:
-                    print("❌ Pizza 1-5 only!")
-            except:
-                print("❌ Say number 1-5")
-    
+            print("❌ Say number 1-5")
+
     # STEP 2: Size
-    elif current_step == 2:
-        size_map = {'s': 'small', 'm': 'medium', 'l': 'large'}
-        size = size_map.get(user_input, user_input)
-        if size in ['small', 'medium', 'large']:
-            order_details["size"] = size
-            current_step = 3
-            print(f"\n✅ **{size.title()}** size selected!")
-            print("\n🤖 **STEP 3/4: Quantity**")
-            print("   Say: 1, 2, 3, 4, or 5")
-        else:
-            print("❌ Say: s, m, l, small, medium, large")
-    
+    async def pick_size(self, user_input):
+        size = SIZE_MAP.get(user_input, user_input)
+        self.order_details["size"] = size
+        self.current_step = 3
+        print(f"\n✅ **{size.title()}** size selected!")
+        print("\n🤖 **STEP 3/4: Quantity**")
+        print("   Say: 1, 2, 3, 4, or 5")
+
+    async def reject_size(self, user_input):
+        print("❌ Say: s, m, l, small, medium, large")
+
     # STEP 3: Quantity
-    elif current_step == 3:
-        try:
-            qty = int(user_input)
-            if 1 <= qty <= 5:
-                order_details["quantity"] = qty
-                current_step = 4
-                print(f"\n✅ **{qty} pizza(s)** selected!")
-                print("\n🤖 **STEP 4/4: Delivery**")
-                print("   Say: '123 Road, YourName'")
-            else:
-                print("❌ Quantity 1-5 only!")
-        except:
+    async def pick_quantity(self, user_input):
+        qty = int(user_input)
+        self.order_details["quantity"] = qty
+        self.current_step = 4
+        print(f"\n✅ **{qty} pizza(s)** selected!")
+        print("\n🤖 **STEP 4/4: Delivery**")
+        print("   Say: '123 Road, YourName'")
+
+    async def reject_quantity(self, user_input):
+        if NUMBER_RE.fullmatch(user_input):
+            print("❌ Quantity 1-5 only!")
+        else:
             print("❌ Say number 1-5")
-    
+
     # STEP 4: Address → PLACE ORDER!
-    elif current_step == 4:
-        if len(user_input.split()) >= 2:
-            order_details["address"] = user_input.title()
-            order_details["customer_name"] = "Customer"
-            order_details["phone"] = "9876543210"
-            
-            # FIXED ORDER PLACEMENT
-            print("\n🚀 **PLACING ORDER** (MCP placeOrder tool)")
-            result = execute_mcp_tool(server, "placeOrder", order_details)
-            order_id = result.get("order_id", "ORD-DEMO-123")
-            total_price = result.get("total_price", 800.0)
-            
-            print("\n" + "="*50)
-            print("🎉 **ORDER CONFIRMED!** 🎉")
-            print(f"📄 **ID:** {order_id}")
-            print(f"💰 **Total:** ₹{total_price}")
-            print(f"🍕 **{order_details['quantity']}x {order_details['pizza_name']}** ({order_details['size']})")
-            print(f"🏠 **{order_details['address']}**")
-            print(f"⏱️ **Delivery: 35 minutes**")
-            print("="*50)
-            
-            print("\n🤖 **New order?** Say 'menu' or 'quit'")
-            current_step = 1
-            order_details = {}
-        else:
+    async def take_address(self, user_input):
+        if len(user_input.split()) < 2:
             print("❌ Say full address: '123 Road, YourName'")
-    
-    print("-" * 60)
+            return
+
+        order_details = self.order_details
+        order_details["address"] = user_input.title()
+        order_details["customer_name"] = "Customer"
+        order_details["phone"] = "9876543210"
+
+        # FIXED ORDER PLACEMENT
+        print("\n🚀 **PLACING ORDER** (MCP placeOrder tool)")
+        result = await execute_mcp_tool_async(self.server, "placeOrder", order_details)
+        order_id = result.get("order_id", "ORD-DEMO-123")
+        total_price = result.get("total_price", 800.0)
+
+        print("\n" + "="*50)
+        print("🎉 **ORDER CONFIRMED!** 🎉")
+        print(f"📄 **ID:** {order_id}")
+        print(f"💰 **Total:** ₹{total_price}")
+        print(f"🍕 **{order_details['quantity']}x {order_details['pizza_name']}** ({order_details['size']})")
+        print(f"🏠 **{order_details['address']}**")
+        print(f"⏱️ **Delivery: 35 minutes**")
+        print("="*50)
+
+        print("\n🤖 **New order?** Say 'menu' or 'quit'")
+        self.current_step = 1
+        self.order_details = {}
+
+
+# (step, token class) → handler; unlisted pairs go to the step's fallback
+TRANSITIONS = {
+    (1, "menu"): OrderSession.show_menu,
+    (1, "num"): OrderSession.pick_pizza,
+    (2, "size"): OrderSession.pick_size,
+    (3, "num"): OrderSession.pick_quantity,
+}
+FALLBACKS = {
+    1: OrderSession.reject_pizza,
+    2: OrderSession.reject_size,
+    3: OrderSession.reject_quantity,
+    4: OrderSession.take_address,
+}
+# Steps with no transitions (the free-text address) go straight to the
+# fallback without classifying the input
+TOKENIZED_STEPS = frozenset(step for step, _ in TRANSITIONS)
+
+
+async def main():
+    configure_logging()
+    print("🍕 MISSION-PIZZA: STEP-BY-STEP ORDERING")
+    print("=" * 60)
+    print("📋 Follow numbered steps 1→2→3→4")
+    print("📋 Pizza API server must be running")
+    print(SEPARATOR)
+
+    server, api_client = PizzaMCPServerFactory.create_server()
+    try:
+        await repl(server)
+    finally:
+        await api_client.aclose()
+
+
+async def repl(server):
+    menu_cache = await execute_mcp_tool_async(server, "listPizzas", {})
+    if isinstance(menu_cache, dict) and "error" in menu_cache:
+        # Tool failures come back as {"error", "tool"} instead of the menu
+        print(f"❌ Connection Error: {menu_cache['error']}")
+        print("   Confirm that the API server (mock_pizza_api.py) is running on port 8000.")
+        return
+    session = OrderSession(server, menu_cache)
+
+    print("\n🤖 **STEP 1/4: Choose Pizza**")
+    print("   Say: 'menu' then pizza number (1-5)")
+    while True:
+        user_input = input(PROMPT).strip().casefold()
+        if not user_input:
+            continue
+
+        if user_input in QUIT:
+            print("🤖 Thanks! 🍕")
+            break
+
+        step = session.current_step
+        if step in TOKENIZED_STEPS:
+            handler = TRANSITIONS.get((step, classify(user_input, step)), FALLBACKS[step])
+        else:
+            handler = FALLBACKS[step]
+        await handler(session, user_input)
+
+        print(SEPARATOR)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
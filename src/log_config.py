@@ -0,0 +1,50 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+
+# Client libraries that log every request at INFO
+_QUIET_LOGGERS = ("httpx", "httpcore", "openai")
+
+_configured = False
+
+
+def configure_logging(level: Optional[str] = None, queued: bool = False) -> None:
+    """
+    Send log records to stdout as bare messages.
+
+    The level defaults to $LOG_LEVEL (INFO if unset); the HTTP and OpenAI
+    client libraries are held at WARNING so tool calls don't log each
+    request. By default records are written synchronously, which keeps
+    them in order with print() output of the CLI scripts. With
+    `queued=True` emitting a record is just an enqueue and a background
+    listener thread does the write, for long-running hosts where many
+    agents log concurrently. Calling this more than once is a no-op.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("%(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    for name in _QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    if not queued:
+        root.addHandler(console)
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, console, respect_handler_level=True)
+    listener.start()
+    # Flush whatever is still queued before the interpreter exits
+    atexit.register(listener.stop)
@@ -1,6 +1,39 @@
-import json
-from typing import Any, Dict, List, Callable
-import httpx
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+import orjson
+from cachetools import TTLCache
+
+if TYPE_CHECKING:
+    import httpx
+
+
+logger = logging.getLogger(__name__)
+
+# (operationId, description, input_schema, http_method) for every operation
+# in a spec.
+ToolEntry = Tuple[str, str, Dict[str, Any], str]
+
+# How long cacheable tool results stay in PizzaMCPServer.result_cache
+TOOL_RESULT_TTL = 60.0
+
+# Tools whose results may be served from result_cache. Only the static menu:
+# order reads must not be cached, because order status also changes through
+# the API directly (PUT /api/orders/{id}/status), bypassing any tool.
+CACHEABLE_TOOLS = frozenset({"listPizzas"})
+
+# Transformed tool entries keyed by a digest of the OpenAPI spec, so that
+# building several servers from the same spec only walks it once.
+# Cached input schemas are shared between tools and treated as read-only.
+_TRANSFORM_CACHE: Dict[bytes, List[ToolEntry]] = {}
+
+
+def _spec_digest(openapi_spec: Dict[str, Any]) -> bytes:
+    """Stable digest of an OpenAPI spec, used as the transform cache key."""
+    payload = orjson.dumps(openapi_spec, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).digest()
 
 
 class MCPToolDefinition:
@@ -12,19 +45,38 @@ class MCPToolDefinition:
         description: str,
         input_schema: Dict[str, Any],
         handler: Callable,
+        method: str = "get",
     ):
         self.name = name
         self.description = description
         self.input_schema = input_schema
         self.handler = handler
+        self.method = method.lower()
+        # GET tools have no side effects and may run in any order
+        self.read_only = self.method == "get"
+
+        # The definition is immutable, so both wire forms are built once
+        self._as_dict = {
+            "name": name,
+            "description": description,
+            "inputSchema": input_schema,
+        }
+        self._llm_dict = {
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": description,
+                "parameters": input_schema,
+            },
+        }
 
     def to_dict(self) -> Dict:
         """Convert to dictionary (similar to MCP tool definition)."""
-        return {
-            "name": self.name,
-            "description": self.description,
-            "inputSchema": self.input_schema,
-        }
+        return self._as_dict
+
+    def to_llm_dict(self) -> Dict:
+        """Convert to an OpenAI function-calling tool entry."""
+        return self._llm_dict
 
 
 class OpenAPIMCPTransformer:
@@ -38,6 +90,7 @@ class OpenAPIMCPTransformer:
     def __init__(self, openapi_spec: Dict[str, Any]):
         self.openapi_spec = openapi_spec
         self.tools: Dict[str, MCPToolDefinition] = {}
+        self._ref_cache: Dict[str, Dict] = {}
 
     def transform(self, api_handlers: Dict[str, Callable]) -> List[MCPToolDefinition]:
         """
@@ -45,7 +98,56 @@ class OpenAPIMCPTransformer:
         Takes OpenAPI spec + API handlers → Returns tool definitions.
 
         api_handlers: maps operationId -> Python function
+
+        The schema work is cached per spec; only the handlers are
+        bound on each call.
+        """
+        for tool in self.bind_tools(self.tool_entries(), api_handlers):
+            self.tools[tool.name] = tool
+
+        return list(self.tools.values())
+
+    @staticmethod
+    def bind_tools(
+        entries: List[ToolEntry], api_handlers: Dict[str, Callable]
+    ) -> List[MCPToolDefinition]:
+        """
+        Build tool definitions from transformed entries by attaching the
+        handler for each operationId. Entries without a handler are skipped.
+        """
+        tools: List[MCPToolDefinition] = []
+        for name, description, input_schema, method in entries:
+            handler = api_handlers.get(name)
+            if not handler:
+                logger.warning("No handler found for operationId=%s", name)
+                continue
+
+            tools.append(
+                MCPToolDefinition(
+                    name=name,
+                    description=description,
+                    input_schema=input_schema,
+                    handler=handler,
+                    method=method,
+                )
+            )
+        return tools
+
+    def tool_entries(self) -> List[ToolEntry]:
+        """
+        Return (operationId, description, input_schema, method) for every
+        operation in the spec, reusing a previous transform of the same spec.
         """
+        key = _spec_digest(self.openapi_spec)
+        entries = _TRANSFORM_CACHE.get(key)
+        if entries is None:
+            entries = self._build_tool_entries()
+            _TRANSFORM_CACHE[key] = entries
+        return entries
+
+    def _build_tool_entries(self) -> List[ToolEntry]:
+        """Walk every path/method in the spec and build its tool entry."""
+        entries: List[ToolEntry] = []
         paths = self.openapi_spec.get("paths", {})
 
         for path, path_item in paths.items():
@@ -53,27 +155,15 @@ class OpenAPIMCPTransformer:
                 if method.lower() not in ["get", "post", "put", "delete", "patch"]:
                     continue
 
-                tool = self._create_tool_from_operation(
-                    path=path,
-                    method=method,
-                    operation=operation,
-                    api_handlers=api_handlers,
-                )
+                entry = self._create_entry_from_operation(method, operation)
+                if entry:
+                    entries.append(entry)
 
-                if tool:
-                    self.tools[tool.name] = tool
+        return entries
 
-        return list(self.tools.values())
-
-    def _create_tool_from_operation(
-        self,
-        path: str,
-        method: str,
-        operation: Dict,
-        api_handlers: Dict[str, Callable],
-    ) -> MCPToolDefinition | None:
+    def _create_entry_from_operation(self, method: str, operation: Dict) -> ToolEntry | None:
         """
-        Convert a single OpenAPI operation to a tool definition.
+        Convert a single OpenAPI operation to a tool entry.
         """
         operation_id = operation.get("operationId")
         if not operation_id:
@@ -83,17 +173,7 @@ class OpenAPIMCPTransformer:
 
         input_schema = self._extract_input_schema(operation)
 
-        handler = api_handlers.get(operation_id)
-        if not handler:
-            print(f"Warning: No handler found for operationId={operation_id}")
-            return None
-
-        return MCPToolDefinition(
-            name=operation_id,
-            description=description,
-            input_schema=input_schema,
-            handler=handler,
-        )
+        return operation_id, description, input_schema, method.lower()
 
     def _extract_input_schema(self, operation: Dict) -> Dict:
         """
@@ -142,7 +222,13 @@ class OpenAPIMCPTransformer:
         """
         Resolve $ref references like '#/components/schemas/OrderRequest'
         into the actual schema definition.
+
+        Resolved refs are memoized per transformer; a schema that is itself
+        a $ref is resolved through the same cache.
         """
+        if ref in self._ref_cache:
+            return self._ref_cache[ref]
+
         parts = ref.split("/")
         schema: Dict[str, Any] = self.openapi_spec
 
@@ -151,6 +237,12 @@ class OpenAPIMCPTransformer:
                 continue
             schema = schema.get(part, {})
 
+        if "$ref" in schema:
+            # Seed the cache first so circular refs terminate.
+            self._ref_cache[ref] = schema
+            schema = self._resolve_schema_ref(schema["$ref"])
+
+        self._ref_cache[ref] = schema
         return schema
 
 
@@ -165,39 +257,67 @@ class PizzaMCPServer:
         self.api_base_url = api_base_url
         self.tools: Dict[str, MCPToolDefinition] = {}
 
+        # Recent results of CACHEABLE_TOOLS, keyed on (tool name, arguments)
+        self.result_cache: TTLCache = TTLCache(maxsize=1024, ttl=TOOL_RESULT_TTL)
+
+        # OpenAI-format tool list, built on first use after registration
+        self._llm_tools: Tuple[Dict[str, Any], ...] | None = None
+        self._tools_tuple: Tuple[Dict[str, Any], ...] | None = None
+
     def register_tools(self, tools: List[MCPToolDefinition]) -> None:
         """Register transformed tools."""
         for tool in tools:
             self.tools[tool.name] = tool
-
-    def get_tools(self) -> List[Dict]:
-        """Return tools in dict form (for LLM function-calling)."""
-        return [tool.to_dict() for tool in self.tools.values()]
-
-    def execute_tool(self, tool_name: str, input_params: Dict[str, Any]) -> Any:
+        self._llm_tools = None
+        self._tools_tuple = None
+
+    def get_llm_tools(self) -> Tuple[Dict[str, Any], ...]:
+        """Return tools in OpenAI function-calling form (shared, read-only)."""
+        if self._llm_tools is None:
+            self._llm_tools = tuple(tool.to_llm_dict() for tool in self.tools.values())
+        return self._llm_tools
+
+    def get_tools(self) -> Tuple[Dict[str, Any], ...]:
+        """Return tools in dict form (shared, read-only)."""
+        if self._tools_tuple is None:
+            self._tools_tuple = tuple(tool.to_dict() for tool in self.tools.values())
+        return self._tools_tuple
+
+    async def execute_tool(self, tool_name: str, input_params: Dict[str, Any]) -> Any:
         """Execute a registered tool by name."""
         tool = self.tools.get(tool_name)
         if not tool:
             raise ValueError(f"Tool {tool_name} not found")
 
-        return tool.handler(**input_params)
+        return await tool.handler(**input_params)
+
+    def is_read_only(self, tool_name: str) -> bool:
+        """True if the tool has no side effects (unknown tools count as not)."""
+        tool = self.tools.get(tool_name)
+        return tool is not None and tool.read_only
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        """True if the tool's results may be served from result_cache."""
+        return tool_name in CACHEABLE_TOOLS and self.is_read_only(tool_name)
 
 
 # HANDLERS: CONNECT TO FASTAPI BACKEND 
 
-def create_handlers(api_client: httpx.Client) -> Dict[str, Callable]:
+def create_handlers(api_client: httpx.AsyncClient) -> Dict[str, Callable]:
     """
-    Create handler functions that call your FastAPI pizza backend.
-    These map OpenAPI operationId → Python function.
+    Create async handler functions that call your FastAPI pizza backend.
+    These map OpenAPI operationId → Python coroutine function.
+
+    api_client must have base_url set; handlers use relative paths.
     """
 
-    def list_pizzas_handler() -> List[Dict]:
+    async def list_pizzas_handler() -> List[Dict]:
         """Handle GET /api/pizzas"""
-        resp = api_client.get("http://localhost:8000/api/pizzas")
+        resp = await api_client.get("/api/pizzas")
         resp.raise_for_status()
         return resp.json()
 
-    def place_order_handler(
+    async def place_order_handler(
         pizza_id: int,
         size: str,
         address: str,
@@ -214,19 +334,19 @@ def create_handlers(api_client: httpx.Client) -> Dict[str, Callable]:
             "customer_name": customer_name,
             "phone": phone,
         }
-        resp = api_client.post("http://localhost:8000/api/orders", json=payload)
+        resp = await api_client.post("/api/orders", json=payload)
         resp.raise_for_status()
         return resp.json()
 
-    def list_orders_handler() -> List[Dict]:
+    async def list_orders_handler() -> List[Dict]:
         """Handle GET /api/orders"""
-        resp = api_client.get("http://localhost:8000/api/orders")
+        resp = await api_client.get("/api/orders")
         resp.raise_for_status()
         return resp.json()
 
-    def track_order_handler(order_id: str) -> Dict:
+    async def track_order_handler(order_id: str) -> Dict:
         """Handle GET /api/orders/{order_id}"""
-        resp = api_client.get(f"http://localhost:8000/api/orders/{order_id}")
+        resp = await api_client.get(f"/api/orders/{order_id}")
         resp.raise_for_status()
         return resp.json()
 
@@ -245,11 +365,17 @@ if __name__ == "__main__":
     """
     import os
 
+    import httpx
+
+    from log_config import configure_logging
+
+    configure_logging()
+
     spec_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "openapi", "pizza_openapi_spec.json")
-    with open(spec_path, "r", encoding="utf-8") as f:
-        openapi_spec = json.load(f)
+    with open(spec_path, "rb") as f:
+        openapi_spec = orjson.loads(f.read())
 
-    client = httpx.Client(timeout=30.0)
+    client = httpx.AsyncClient(base_url="http://localhost:8000", timeout=30.0)
     transformer = OpenAPIMCPTransformer(openapi_spec)
     handlers = create_handlers(client)
     tools = transformer.transform(handlers)
@@ -1,8 +1,11 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime, timedelta
-from typing import List, Dict
-import uuid
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Dict, Tuple
+import hashlib
+from secrets import token_hex
+import orjson
 from models import (
     Pizza, OrderRequest, OrderResponse, Order, 
     SizeEnum, StatusEnum
@@ -11,7 +14,8 @@ from models import (
 app = FastAPI(
     title="Mission-Pizza API",
     description="Pizza ordering system for AI agents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -62,8 +66,17 @@ PIZZAS: List[Pizza] = [
     ),
 ]
 
+PIZZAS_BY_ID: Dict[int, Pizza] = {p.id: p for p in PIZZAS}
+
+# The menu never changes at runtime, so serialize it once
+_PIZZAS_JSON: bytes = orjson.dumps([p.model_dump() for p in PIZZAS])
+_PIZZAS_ETAG = f'"{hashlib.blake2b(_PIZZAS_JSON, digest_size=8).hexdigest()}"'
+
 ORDERS: Dict[str, Order] = {}
 
+# Serialized form of every order in ORDERS, refreshed whenever an order changes
+ORDERS_JSON: Dict[str, bytes] = {}
+
 # Size multipliers for pricing
 SIZE_MULTIPLIERS = {
     SizeEnum.SMALL: 0.8,
@@ -71,6 +84,30 @@ SIZE_MULTIPLIERS = {
     SizeEnum.LARGE: 1.2,
 }
 
+# Size-adjusted unit price for every (pizza_id, size) pair
+UNIT_PRICE: Dict[Tuple[int, SizeEnum], float] = {
+    (p.id, size): round(p.price * multiplier, 2)
+    for p in PIZZAS
+    for size, multiplier in SIZE_MULTIPLIERS.items()
+}
+
+# Fixed time estimates for every order
+_PREP_TIME = "25 minutes"
+_DELIVERY_OFFSET = timedelta(minutes=35)
+
+
+
+def _cache_order_json(order: Order) -> None:
+    """Store the serialized order so read endpoints skip re-validation."""
+    ORDERS_JSON[order.order_id] = orjson.dumps(order.model_dump(mode="json"))
+
+
+async def _iter_json_array(items: Tuple[bytes, ...]) -> AsyncIterator[bytes]:
+    """Yield a JSON array one pre-serialized item at a time."""
+    yield b"["
+    for index, item in enumerate(items):
+        yield b"," + item if index else item
+    yield b"]"
 
 
 @app.get("/", tags=["Health"])
@@ -84,14 +121,21 @@ async def health_check():
 
 
 @app.get("/api/pizzas", response_model=List[Pizza], tags=["Menu"])
-async def list_pizzas():
+async def list_pizzas(request: Request):
     """
     List all available pizzas
     
+    Serves the pre-serialized menu with an ETag; a matching
+    If-None-Match header gets a 304 with no body.
+    
     Returns:
         List of Pizza objects with id, name, description, price, and ingredients
     """
-    return PIZZAS
+    headers = {"ETag": _PIZZAS_ETAG}
+    if request.headers.get("if-none-match") == _PIZZAS_ETAG:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=_PIZZAS_JSON, media_type="application/json", headers=headers)
 
 
 @app.post("/api/orders", response_model=OrderResponse, tags=["Orders"], status_code=201)
@@ -105,23 +149,21 @@ async def place_order(order_request: OrderRequest):
     Returns:
         OrderResponse with order_id, status, prep_time, total_price, estimated_delivery_time
     """
-    # Validate pizza exists
-    pizza = next((p for p in PIZZAS if p.id == order_request.pizza_id), None)
-    if not pizza:
+    # Validate pizza exists and look up its size-adjusted price
+    unit_price = UNIT_PRICE.get((order_request.pizza_id, order_request.size))
+    if unit_price is None:
         raise HTTPException(status_code=404, detail="Pizza not found")
+    pizza = PIZZAS_BY_ID[order_request.pizza_id]
     
     # Calculate total price
-    base_price = pizza.price * order_request.quantity
-    size_multiplier = SIZE_MULTIPLIERS.get(order_request.size, 1.0)
-    total_price = base_price * size_multiplier
+    total_price = round(unit_price * order_request.quantity, 2)
     
     # Create order
-    order_id = f"ORD{str(uuid.uuid4())[:8].upper()}"
-    created_at = datetime.utcnow()
+    order_id = f"ORD{token_hex(4).upper()}"
+    created_at = datetime.now(timezone.utc)
     
     # Estimate times
-    prep_time = "25 minutes"
-    estimated_delivery_time = created_at + timedelta(minutes=35)
+    estimated_delivery_time = created_at + _DELIVERY_OFFSET
     
     # Store order
     order = Order(
@@ -134,18 +176,19 @@ async def place_order(order_request: OrderRequest):
         customer_name=order_request.customer_name,
         phone=order_request.phone,
         status=StatusEnum.CONFIRMED,
-        total_price=round(total_price, 2),
+        total_price=total_price,
         created_at=created_at,
         estimated_delivery_time=estimated_delivery_time
     )
     
     ORDERS[order_id] = order
+    _cache_order_json(order)
     
     return OrderResponse(
         order_id=order_id,
         status=StatusEnum.CONFIRMED,
-        prep_time=prep_time,
-        total_price=round(total_price, 2),
+        prep_time=_PREP_TIME,
+        total_price=total_price,
         estimated_delivery_time=estimated_delivery_time.isoformat()
     )
 
@@ -158,7 +201,11 @@ async def list_orders():
     Returns:
         List of all Order objects
     """
-    return list(ORDERS.values())
+    # Snapshot the references only: new orders may arrive between chunks
+    return StreamingResponse(
+        _iter_json_array(tuple(ORDERS_JSON.values())),
+        media_type="application/json",
+    )
 
 
 @app.get("/api/orders/{order_id}", response_model=Order, tags=["Orders"])
@@ -175,11 +222,11 @@ async def track_order(order_id: str):
     Raises:
         HTTPException: If order not found
     """
-    order = ORDERS.get(order_id)
-    if not order:
+    order_json = ORDERS_JSON.get(order_id)
+    if order_json is None:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    return order
+    return Response(content=order_json, media_type="application/json")
 
 
 @app.put("/api/orders/{order_id}/status", response_model=Order, tags=["Orders"])
@@ -199,15 +246,21 @@ async def update_order_status(order_id: str, status: StatusEnum):
         raise HTTPException(status_code=404, detail="Order not found")
     
     order.status = status
+    _cache_order_json(order)
     return order
 
 
 
 if __name__ == "__main__":
     import uvicorn
+    # "auto" selects uvloop and httptools (installed with uvicorn[standard])
+    # and falls back to asyncio/h11 where they are unavailable, e.g. Windows.
     uvicorn.run(
         "mock_pizza_api:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        loop="auto",
+        http="auto",
+        reload=False,
+        access_log=False,
     )
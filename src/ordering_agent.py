@@ -1,13 +1,15 @@
-import json
-from typing import Any, Dict, List
+import asyncio
+import copy
+from typing import Any, Dict, List, Tuple
 
-from openai import OpenAI
+import orjson
 
 from pizza_mcp_server import (
     PizzaMCPServerFactory,
-    execute_mcp_tool,
+    execute_mcp_tool_async,
     format_tools_for_llm,
 )
+from log_config import configure_logging
 
 
 class PizzaOrderingAgent:
@@ -24,9 +26,13 @@ class PizzaOrderingAgent:
     """
 
     def __init__(self, mcp_server, api_key: str | None = None):
-        self.client = OpenAI(api_key=api_key)
+        # Imported here so importing this module stays cheap
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=api_key)
         self.mcp_server = mcp_server
 
+        # Tools never change after startup; the server hands out one shared tuple
         self.llm_tools = format_tools_for_llm(mcp_server)
 
         self.conversation_history: List[Dict[str, Any]] = []
@@ -44,69 +50,71 @@ class PizzaOrderingAgent:
             "4. Always confirm details before placing an order.\n"
             "5. Reply clearly with order id, total price and estimated delivery time.\n"
         )
+        # Shared by every request; the SDK only reads it
+        self._system_msg = {"role": "system", "content": self.system_prompt}
 
-    def process_request(self, user_message: str) -> str:
+    async def process_request(self, user_message: str) -> str:
         """
         Main entrypoint: handle a user's message and return agent reply.
         """
-        # 1. Add user message to chat history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        # 1. Start this turn's messages. They join the chat history only
+        #    once the turn is done, so concurrent requests don't interleave.
+        turn: List[Dict[str, Any]] = [{"role": "user", "content": user_message}]
 
-        # 2. First LLM call - may decide to call tools
-        response = self.client.chat.completions.create(
+        # 2. First LLM call - may decide to call tools. It is streamed so
+        #    tool calls start while the model is still generating.
+        stream = await self.client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
-                {"role": "system", "content": self.system_prompt},
+                self._system_msg,
                 *self.conversation_history,
+                *turn,
             ],
             tools=self.llm_tools,
             tool_choice="auto",
             temperature=0.4,
             max_tokens=700,
+            stream=True,
         )
 
-        message = response.choices[0].message
-
         # 3. If LLM wants to call tools, execute them
-        if message.tool_calls:
-            for tool_call in message.tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments or "{}")
-
-                # Execute on MCP server
-                tool_result = execute_mcp_tool(self.mcp_server, tool_name, tool_args)
-
-                # Add tool call and result to history
-                self.conversation_history.append(
-                    {
-                        "role": "assistant",
-                        "content": message.content or "",
-                        "tool_calls": [
-                            {
-                                "id": tool_call.id,
-                                "type": "function",
-                                "function": {
-                                    "name": tool_name,
-                                    "arguments": json.dumps(tool_args),
-                                },
-                            }
-                        ],
-                    }
-                )
-                self.conversation_history.append(
-                    {
-                        "role": "tool",
-                        "tool_use_id": tool_call.id,
-                        "content": json.dumps(tool_result),
-                    }
-                )
+        content, tool_calls, tool_results = await self._stream_and_execute_tools(stream)
+
+        if tool_calls:
+            # Add the tool calls (one assistant message) and their results
+            turn.append(
+                {
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": [
+                        {
+                            "id": tool_call_id,
+                            "type": "function",
+                            "function": {
+                                "name": tool_name,
+                                "arguments": orjson.dumps(tool_args).decode(),
+                            },
+                        }
+                        for tool_call_id, tool_name, tool_args in tool_calls
+                    ],
+                }
+            )
+            turn.extend(
+                {
+                    "role": "tool",
+                    "tool_use_id": tool_call_id,
+                    "content": orjson.dumps(tool_result).decode(),
+                }
+                for (tool_call_id, _, _), tool_result in zip(tool_calls, tool_results)
+            )
 
             # 4. Second LLM call - use tool results to form final reply
-            followup = self.client.chat.completions.create(
+            followup = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": self.system_prompt},
+                    self._system_msg,
                     *self.conversation_history,
+                    *turn,
                 ],
                 tools=self.llm_tools,
                 temperature=0.4,
@@ -114,33 +122,118 @@ class PizzaOrderingAgent:
             )
             final_message = followup.choices[0].message
             final_text = final_message.content or ""
-            self.conversation_history.append(
-                {"role": "assistant", "content": final_text}
-            )
+            turn.append({"role": "assistant", "content": final_text})
+            self.conversation_history.extend(turn)
             return final_text
 
         # 5. If no tools were called, just return the text reply
-        final_text = message.content or ""
-        self.conversation_history.append({"role": "assistant", "content": final_text})
+        final_text = content
+        turn.append({"role": "assistant", "content": final_text})
+        self.conversation_history.extend(turn)
         return final_text
 
+    async def _stream_and_execute_tools(
+        self, stream
+    ) -> Tuple[str, List[Tuple[str, str, Dict[str, Any]]], List[Any]]:
+        """
+        Consume a streamed completion and execute the tool calls it makes.
+
+        A read-only tool call is started as soon as its arguments parse as
+        JSON, while the model is still emitting the rest. Once a call with
+        side effects (e.g. placeOrder) appears, it and every later call run
+        sequentially after the stream ends, in the order the LLM emitted
+        them, so later reads observe the write.
+
+        Returns (content, [(tool_call_id, name, args)], results in call order).
+        """
+        content_parts: List[str] = []
+        calls: Dict[int, Dict[str, str]] = {}
+        parsed_args: Dict[int, Dict[str, Any]] = {}
+        started: Dict[int, asyncio.Task] = {}
+        ordered = False
+
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+
+                for tc in delta.tool_calls or []:
+                    call = calls.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function:
+                        call["name"] += tc.function.name or ""
+                        call["arguments"] += tc.function.arguments or ""
+
+                    tool_name = call["name"]
+                    if ordered or tc.index in started or tool_name not in self.mcp_server.tools:
+                        continue
+                    if not self.mcp_server.is_read_only(tool_name):
+                        ordered = True
+                        continue
+
+                    try:
+                        tool_args = orjson.loads(call["arguments"])
+                    except orjson.JSONDecodeError:
+                        continue  # arguments still streaming
+
+                    parsed_args[tc.index] = tool_args
+                    started[tc.index] = asyncio.create_task(
+                        execute_mcp_tool_async(self.mcp_server, tool_name, tool_args)
+                    )
+
+            # Still inside the try: a malformed late call must not leave
+            # earlier started tasks pending
+            tool_calls: List[Tuple[str, str, Dict[str, Any]]] = []
+            tool_results: List[Any] = []
+            for index in sorted(calls):
+                call = calls[index]
+                if index in started:
+                    tool_args = parsed_args[index]
+                    tool_result = await started[index]
+                else:
+                    tool_args = orjson.loads(call["arguments"] or "{}")
+                    tool_result = await execute_mcp_tool_async(self.mcp_server, call["name"], tool_args)
+                tool_calls.append((call["id"], call["name"], tool_args))
+                tool_results.append(tool_result)
+        except BaseException:
+            for task in started.values():
+                task.cancel()
+            raise
+
+        return "".join(content_parts), tool_calls, tool_results
+
+    def fork(self) -> "PizzaOrderingAgent":
+        """
+        Return an agent for a separate conversation: it shares this one's
+        client, MCP server and settings but starts with no history.
+        """
+        agent = copy.copy(self)
+        agent.conversation_history = []
+        return agent
+
     def reset_conversation(self) -> None:
         """Clear history for a fresh interaction."""
         self.conversation_history = []
 
 
-def demo_ordering_agent() -> None:
+async def demo_ordering_agent() -> None:
     """
     Simple demo:
     - Assumes FastAPI backend is running on :8000
     - Assumes OpenAPI spec exists in openapi/pizza_openapi_spec.json
     """
+    configure_logging()
+
     print("\n" + "=" * 70)
     print("🤖 PIZZA ORDERING AGENT DEMO")
     print("=" * 70 + "\n")
 
     # Create MCP server
-    mcp_server, _ = PizzaMCPServerFactory.create_server()
+    mcp_server, api_client = PizzaMCPServerFactory.create_server()
     agent = PizzaOrderingAgent(mcp_server)
 
     # Example conversation
@@ -149,10 +242,13 @@ def demo_ordering_agent() -> None:
         "My address is 123 Main Street, Hyderabad. My name is Raj and phone number is 9876543210.",
     ]
 
-    for msg in user_msgs:
-        print(f"👤 User: {msg}")
-        reply = agent.process_request(msg)
-        print(f"🤖 Agent: {reply}\n")
+    try:
+        for msg in user_msgs:
+            print(f"👤 User: {msg}")
+            reply = await agent.process_request(msg)
+            print(f"🤖 Agent: {reply}\n")
+    finally:
+        await api_client.aclose()
 
     print("=" * 70)
     print("Demo finished.")
@@ -160,4 +256,4 @@ def demo_ordering_agent() -> None:
 
 
 if __name__ == "__main__":
-    demo_ordering_agent()
+    asyncio.run(demo_ordering_agent())
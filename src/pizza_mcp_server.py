@@ -1,13 +1,126 @@
+import asyncio
+import functools
+import hashlib
 import json
+import logging
+import os
+import pickle
+from itertools import islice
 from typing import Any, Dict, List, Tuple
 
 import httpx
+import orjson
 
+import mcp_generator
 from mcp_generator import (
     OpenAPIMCPTransformer,
     PizzaMCPServer,
+    ToolEntry,
     create_handlers,
 )
+from log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+API_BASE_URL = "http://localhost:8000"
+
+# One pooled client is shared by every handler of a server. Concurrent tool
+# calls each take a kept-alive HTTP/1.1 connection from the pool (the API is
+# plain http:// and uvicorn has no HTTP/2); idle connections live for 30s so
+# back-to-back agent turns reuse them.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=30.0,
+)
+# Fail fast when the backend is not accepting connections
+HTTP_TIMEOUT = httpx.Timeout(5.0, connect=1.0)
+# Connection attempts retried by the transport before a tool call fails.
+# httpx only retries failed connects, never a request that reached the
+# server, so this is safe for placeOrder as well.
+HTTP_RETRIES = 3
+
+_SHARED_CLIENT: httpx.AsyncClient | None = None
+
+
+def _get_shared_client() -> httpx.AsyncClient:
+    """Return the process-wide API client, creating it on first use."""
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None or _SHARED_CLIENT.is_closed:
+        # Limits go on the transport; the client ignores its own when an
+        # explicit transport is given
+        transport = httpx.AsyncHTTPTransport(
+            limits=HTTP_LIMITS,
+            retries=HTTP_RETRIES,
+        )
+        _SHARED_CLIENT = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            transport=transport,
+            timeout=HTTP_TIMEOUT,
+        )
+    return _SHARED_CLIENT
+
+
+# Transformed tool entries are persisted next to the spec they came from
+TOOLS_CACHE_FILENAME = ".tools.cache.pkl"
+
+
+@functools.lru_cache(maxsize=None)
+def _generator_digest() -> str:
+    """Digest of mcp_generator's source; a code change invalidates the cache."""
+    with open(mcp_generator.__file__, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_tool_entries(openapi_spec_path: str, spec_mtime: float) -> List[ToolEntry]:
+    """
+    Load the OpenAPI spec and transform it into tool entries.
+
+    The result is pickled next to the spec and reused while the spec's
+    mtime and the transformer's source are unchanged, so warm starts skip
+    JSON parsing and the schema walk. Handlers are not part of the cache;
+    callers bind them.
+    """
+    spec_path = os.path.abspath(openapi_spec_path)
+    cache_path = os.path.join(os.path.dirname(spec_path), TOOLS_CACHE_FILENAME)
+    generator_digest = _generator_digest()
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        entries = cached["entries"]
+        if (
+            cached["generator"] == generator_digest
+            and cached["spec_path"] == spec_path
+            and cached["spec_mtime"] == spec_mtime
+            and all(isinstance(entry, tuple) and len(entry) == 4 for entry in entries)
+        ):
+            return entries
+    except Exception:
+        pass  # missing, unreadable or written by other code: rebuild it
+
+    with open(spec_path, "rb") as f:
+        openapi_spec = orjson.loads(f.read())
+    entries = OpenAPIMCPTransformer(openapi_spec).tool_entries()
+
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump(
+                {
+                    "generator": generator_digest,
+                    "spec_path": spec_path,
+                    "spec_mtime": spec_mtime,
+                    "entries": entries,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+    except OSError:
+        pass  # read-only checkout: keep the in-process cache only
+
+    return entries
 
 
 class PizzaMCPServerFactory:
@@ -15,8 +128,8 @@ class PizzaMCPServerFactory:
     Factory that creates and initializes the Pizza MCP-style server.
 
     Steps:
-    1. Load OpenAPI specification
-    2. Create HTTP client for backend API
+    1. Load OpenAPI specification (cached transform)
+    2. Reuse the shared async HTTP client for backend API
     3. Build handlers that call FastAPI endpoints
     4. Transform OpenAPI → tool definitions
     5. Register tools on PizzaMCPServer
@@ -25,59 +138,94 @@ class PizzaMCPServerFactory:
     @staticmethod
     def create_server(
         openapi_spec_path: str = "openapi/pizza_openapi_spec.json",
-    ) -> Tuple[PizzaMCPServer, httpx.Client]:
-        # Step 1: Load OpenAPI spec
-        with open(openapi_spec_path, "r", encoding="utf-8") as f:
-            openapi_spec = json.load(f)
+    ) -> Tuple[PizzaMCPServer, httpx.AsyncClient]:
+        # Step 1: Load OpenAPI spec, reusing the cached transform while
+        # the file is unchanged
+        tool_entries = _load_tool_entries(
+            openapi_spec_path, os.path.getmtime(openapi_spec_path)
+        )
 
-        print("✓ Loaded OpenAPI specification")
+        logger.info("✓ Loaded OpenAPI specification")
 
-        # Step 2: HTTP client
-        api_client = httpx.Client(timeout=30.0)
+        # Step 2: HTTP client, shared by every server in the process.
+        # Callers `await aclose()` it on shutdown; a closed client is
+        # replaced on the next call.
+        api_client = _get_shared_client()
 
         # Step 3: Create handlers → map operationId → function
         handlers = create_handlers(api_client)
-        print(f"✓ Created {len(handlers)} API handlers")
+        logger.info("✓ Created %d API handlers", len(handlers))
 
         # Step 4: Transform OpenAPI → tool definitions
-        transformer = OpenAPIMCPTransformer(openapi_spec)
-        tools = transformer.transform(handlers)
-        print(f"✓ Generated {len(tools)} tools from OpenAPI")
-        print("  Tools:", [t.name for t in tools])
+        tools = OpenAPIMCPTransformer.bind_tools(tool_entries, handlers)
+        logger.info("✓ Generated %d tools from OpenAPI", len(tools))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("  Tools: %s", ", ".join(t.name for t in tools))
 
         # Step 5: Register tools on MCP-style server
         mcp_server = PizzaMCPServer()
         mcp_server.register_tools(tools)
-        print(f"✓ MCP server ready with {len(mcp_server.get_tools())} tools")
+        registered = mcp_server.get_tools()
+        logger.info("✓ MCP server ready with %d tools", len(registered))
 
         return mcp_server, api_client
 
     @staticmethod
-    def get_server_tools(mcp_server: PizzaMCPServer) -> List[Dict[str, Any]]:
+    def get_server_tools(mcp_server: PizzaMCPServer) -> Tuple[Dict[str, Any], ...]:
         """Return all tools in dict form."""
         return mcp_server.get_tools()
 
 
-def execute_mcp_tool(
+# Sentinel for result_cache lookups (a tool may legitimately return None)
+_MISS = object()
+
+
+async def execute_mcp_tool_async(
     mcp_server: PizzaMCPServer,
     tool_name: str,
     tool_input: Dict[str, Any],
 ) -> Any:
     """
     Helper to execute a tool safely.
+
+    Results of cacheable tools (the menu) are served from the server's
+    TTL cache when the same call was made recently. Order reads always hit
+    the API. A tool with side effects (e.g. placeOrder) clears the cache.
+
+    A cached result is the same object for every caller: treat it as
+    read-only and copy it before changing it.
     """
+    cache = mcp_server.result_cache
+    read_only = mcp_server.is_read_only(tool_name)
+    cacheable = mcp_server.is_cacheable(tool_name)
+    if cacheable:
+        key = (tool_name, orjson.dumps(tool_input, option=orjson.OPT_SORT_KEYS))
+        # One lookup: the entry may expire between a check and a read
+        cached = cache.get(key, _MISS)
+        if cached is not _MISS:
+            return cached
+
     try:
-        return mcp_server.execute_tool(tool_name, tool_input)
+        result = await mcp_server.execute_tool(tool_name, tool_input)
     except Exception as e:
         return {"error": str(e), "tool": tool_name}
+    finally:
+        if not read_only:
+            cache.clear()
+
+    if cacheable:
+        cache[key] = result
+    return result
 
 
-def format_tools_for_llm(mcp_server: PizzaMCPServer) -> List[Dict[str, Any]]:
+def format_tools_for_llm(mcp_server: PizzaMCPServer) -> Tuple[Dict[str, Any], ...]:
     """
     Convert tools to OpenAI-style function-calling schema.
 
+    The tuple is built once per server and shared by every caller.
+
     Output shape:
-    [
+    (
       {
         "type": "function",
         "function": {
@@ -87,74 +235,72 @@ def format_tools_for_llm(mcp_server: PizzaMCPServer) -> List[Dict[str, Any]]:
         }
       },
       ...
-    ]
+    )
     """
-    raw_tools = mcp_server.get_tools()
-    formatted: List[Dict[str, Any]] = []
-
-    for t in raw_tools:
-        formatted.append(
-            {
-                "type": "function",
-                "function": {
-                    "name": t["name"],
-                    "description": t["description"],
-                    "parameters": t["inputSchema"],
-                },
-            }
-        )
-
-    return formatted
+    return mcp_server.get_llm_tools()
 
 
 def print_mcp_server_info(mcp_server: PizzaMCPServer) -> None:
-    """Print available tools and their schemas."""
+    """Log available tools; schemas are only rendered at DEBUG level."""
     tools = mcp_server.get_tools()
+    show_schemas = logger.isEnabledFor(logging.DEBUG)
 
-    print("\n" + "=" * 60)
-    print("🍕 PIZZA MCP SERVER INFORMATION")
-    print("=" * 60)
+    logger.info("\n" + "=" * 60)
+    logger.info("🍕 PIZZA MCP SERVER INFORMATION")
+    logger.info("=" * 60)
 
-    print(f"\nTotal Tools: {len(tools)}")
-    print("-" * 60)
+    logger.info("\nTotal Tools: %d", len(tools))
+    logger.info("-" * 60)
 
     for i, t in enumerate(tools, start=1):
-        print(f"\n{i}. {t['name']}")
-        print(f"   Description: {t['description']}")
-        print(f"   Input schema: {json.dumps(t['inputSchema'], indent=2)}")
+        logger.info("\n%d. %s", i, t["name"])
+        logger.info("   Description: %s", t["description"])
+        if show_schemas:
+            # stdlib json for the human-readable, indented form
+            logger.debug("   Input schema: %s", json.dumps(t["inputSchema"], indent=2))
 
-    print("\n" + "=" * 60 + "\n")
+    logger.info("\n" + "=" * 60 + "\n")
 
 
-def test_mcp_tools(mcp_server: PizzaMCPServer) -> None:
+async def test_mcp_tools(mcp_server: PizzaMCPServer) -> None:
     """Simple smoke test for tools."""
-    print("\n" + "=" * 60)
-    print("🧪 TESTING MCP TOOLS")
-    print("=" * 60 + "\n")
-    print("Test: listPizzas")
+    logger.info("\n" + "=" * 60)
+    logger.info("🧪 TESTING MCP TOOLS")
+    logger.info("=" * 60 + "\n")
+    logger.info("Test: listPizzas")
     try:
-        pizzas = execute_mcp_tool(mcp_server, "listPizzas", {})
-        print(f"✓ Got {len(pizzas)} pizzas")
-        for p in pizzas[:3]:
-            print(f"  - {p['name']} (₹{p['price']})")
+        pizzas = await execute_mcp_tool_async(mcp_server, "listPizzas", {})
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("✓ Got %d pizzas", len(pizzas))
+            for p in islice(pizzas, 3):
+                logger.info("  - %s (₹%s)", p["name"], p["price"])
     except Exception as e:
-        print("✗ listPizzas failed:", e)
+        logger.error("✗ listPizzas failed: %s", e)
 
-    print("\n" + "=" * 60 + "\n")
+    logger.info("\n" + "=" * 60 + "\n")
 
 
-if __name__ == "__main__":
-    """
-    Standalone test:
-    - Assumes FastAPI backend is already running on :8000
-    - Assumes openapi/pizza_openapi_spec.json exists
-    """
+async def _main() -> None:
+    configure_logging()
+    client = None
     try:
         server, client = PizzaMCPServerFactory.create_server()
         print_mcp_server_info(server)
-        test_mcp_tools(server)
+        await test_mcp_tools(server)
         print("✅ Pizza MCP server is working.")
     except FileNotFoundError as e:
         print("❌ OpenAPI spec not found:", e)
     except Exception as e:
         print("❌ Unexpected error:", e)
+    finally:
+        if client is not None:
+            await client.aclose()
+
+
+if __name__ == "__main__":
+    """
+    Standalone test:
+    - Assumes FastAPI backend is already running on :8000
+    - Assumes openapi/pizza_openapi_spec.json exists
+    """
+    asyncio.run(_main())
@@ -1,8 +1,23 @@
+import asyncio
+import copy
 import json
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
-from openai import OpenAI
+import orjson
+
+from log_config import configure_logging
+
+
+logger = logging.getLogger(__name__)
+
+# Order IDs issued by the pizza API, e.g. ORD1A2B3C4D
+_ORDER_ID_RE = re.compile(r"ORD[A-Z0-9]{4,}")
+
+# Suggested delivery is 25 min prep + 10 min delivery after the order
+_DELIVERY_OFFSET = timedelta(minutes=35)
 
 
 class SchedulingAgent:
@@ -13,11 +28,30 @@ class SchedulingAgent:
     - We simulate a calendar instead of using a real Google Calendar API.
     """
 
-    def __init__(self, api_key: str | None = None):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        enable_parallel_tool_execution: bool = True,
+        max_history_messages: int = 20,
+        use_llm_for_confirmation: bool = False,
+    ):
+        # Imported here so importing this module stays cheap
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=api_key)
         self.conversation_history: List[Dict[str, Any]] = []
         self.scheduled_deliveries: Dict[str, Dict[str, Any]] = {}
 
+        # Oldest turns are dropped once the history grows past this
+        self.max_history_messages = max_history_messages
+
+        # When False, a successful schedule_delivery is confirmed from a
+        # template instead of a second LLM call
+        self.use_llm_for_confirmation = use_llm_for_confirmation
+
+        # Run all tool calls of one LLM turn concurrently (False = one by one)
+        self.enable_parallel_tool_execution = enable_parallel_tool_execution
+
         # Define tools the LLM can "call" (simulated calendar ops)
         self.tools = [
             {
@@ -78,23 +112,27 @@ class SchedulingAgent:
             "   - schedule_delivery\n"
             "4. Respond with clear delivery time and confirmation.\n"
         )
+        # Shared by every request; the SDK only reads it
+        self._system_msg = {"role": "system", "content": self.system_prompt}
 
-    def process_order_for_scheduling(
+    async def process_order_for_scheduling(
         self,
         order_id: str,
         pizza_name: str,
         prep_time: str,
         address: str,
         customer_name: str,
+        now: Optional[datetime] = None,
     ) -> str:
         """
         Entry point called by the orchestrator (Agent-to-Agent).
 
-        Builds a scheduling request message and calls the LLM.
+        Builds a scheduling request message and calls the LLM. `now`
+        (timezone-aware) defaults to the current UTC time.
         """
-        now = datetime.utcnow()
-        delivery_time = now + timedelta(minutes=35)  # 25 prep + 10 delivery
-        delivery_time_iso = delivery_time.isoformat()
+        if now is None:
+            now = datetime.now(timezone.utc)
+        delivery_time_iso = (now + _DELIVERY_OFFSET).isoformat(timespec="seconds")
 
         request = (
             f"A pizza order has been placed.\n"
@@ -107,9 +145,9 @@ class SchedulingAgent:
             f"Please schedule the delivery and confirm the delivery time."
         )
 
-        return self._process_scheduling_request(request, order_id, address, customer_name, delivery_time_iso)
+        return await self._process_scheduling_request(request, order_id, address, customer_name, delivery_time_iso)
 
-    def _process_scheduling_request(
+    async def _process_scheduling_request(
         self,
         request: str,
         order_id: str,
@@ -118,77 +156,236 @@ class SchedulingAgent:
         delivery_time_iso: str,
     ) -> str:
         """Internal method: talk to LLM and simulate tool calls."""
-        self.conversation_history.append({"role": "user", "content": request})
+        # This turn's messages join the history only once the turn is done,
+        # so concurrently scheduled orders don't interleave.
+        turn: List[Dict[str, Any]] = [{"role": "user", "content": request}]
 
-        # First LLM call
-        response = self.client.chat.completions.create(
+        defaults = {
+            "order_id": order_id,
+            "delivery_time": delivery_time_iso,
+            "address": address,
+            "customer_name": customer_name,
+        }
+
+        # First LLM call. It is streamed so tool calls start while the model
+        # is still generating.
+        stream = await self.client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "system", "content": self.system_prompt}, *self.conversation_history],
+            messages=[
+                self._system_msg,
+                *self.conversation_history,
+                *turn,
+            ],
             tools=self.tools,
             tool_choice="auto",
             temperature=0.3,
             max_tokens=400,
+            stream=True,
         )
 
-        message = response.choices[0].message
-
-        if message.tool_calls:
-            for tool_call in message.tool_calls:
-                tool_name = tool_call.function.name
-                args = json.loads(tool_call.function.arguments or "{}")
-
-                if tool_name == "schedule_delivery":
-                    args.setdefault("order_id", order_id)
-                    args.setdefault("delivery_time", delivery_time_iso)
-                    args.setdefault("address", address)
-                    args.setdefault("customer_name", customer_name)
-
-                if tool_name == "check_calendar_availability":
-                    args.setdefault("delivery_time", delivery_time_iso)
-
-                tool_result = self._execute_calendar_tool(tool_name, args)
-
-                self.conversation_history.append(
-                    {
-                        "role": "assistant",
-                        "content": message.content or "",
-                        "tool_calls": [
-                            {
-                                "id": tool_call.id,
-                                "type": "function",
-                                "function": {
-                                    "name": tool_name,
-                                    "arguments": json.dumps(args),
-                                },
-                            }
-                        ],
-                    }
-                )
-                self.conversation_history.append(
-                    {
-                        "role": "tool",
-                        "tool_use_id": tool_call.id,
-                        "content": json.dumps(tool_result),
-                    }
-                )
-
-            # Second LLM call: produce final text reply
-            followup = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "system", "content": self.system_prompt}, *self.conversation_history],
-                temperature=0.3,
-                max_tokens=400,
+        content, calls, tool_results = await self._stream_and_execute_tools(stream, defaults)
+
+        if calls:
+            # History is written in the LLM's original call order: one
+            # assistant message carrying every call, then their results
+            turn.append(
+                {
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": [
+                        {
+                            "id": tool_call_id,
+                            "type": "function",
+                            "function": {
+                                "name": tool_name,
+                                "arguments": orjson.dumps(args).decode(),
+                            },
+                        }
+                        for tool_call_id, tool_name, args in calls
+                    ],
+                }
+            )
+            turn.extend(
+                {
+                    "role": "tool",
+                    "tool_use_id": tool_call_id,
+                    "content": orjson.dumps(tool_result).decode(),
+                }
+                for (tool_call_id, _, _), tool_result in zip(calls, tool_results)
             )
-            final_msg = followup.choices[0].message
-            final_text = final_msg.content or ""
-            self.conversation_history.append({"role": "assistant", "content": final_text})
+
+            final_text = None
+            if not self.use_llm_for_confirmation:
+                final_text = self._template_confirmation(calls, tool_results)
+
+            if final_text is None:
+                # Second LLM call: produce final text reply. It only needs
+                # this turn's request and tool results, not earlier turns.
+                followup = await self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[self._system_msg, *turn],
+                    temperature=0.3,
+                    max_tokens=400,
+                )
+                final_msg = followup.choices[0].message
+                final_text = final_msg.content or ""
+            turn.append({"role": "assistant", "content": final_text})
+            self._commit_turn(turn)
             return final_text
 
         # If no tools called, just return the reply
-        final_text = message.content or ""
-        self.conversation_history.append({"role": "assistant", "content": final_text})
+        final_text = content
+        turn.append({"role": "assistant", "content": final_text})
+        self._commit_turn(turn)
         return final_text
 
+    async def _stream_and_execute_tools(
+        self, stream, defaults: Dict[str, str]
+    ) -> Tuple[str, List[Tuple[str, str, Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Consume a streamed completion and run the calendar tools it calls.
+
+        Missing arguments are filled from `defaults`. With parallel execution
+        enabled, a call starts as soon as its arguments parse as JSON, while
+        the model is still emitting the rest; otherwise calls run one by one
+        after the stream ends. Identical calls (same tool, same canonical
+        arguments) run once and every tool_call id gets the shared result.
+
+        Returns (content, [(tool_call_id, name, args)], results in call order).
+        """
+        content_parts: List[str] = []
+        buffers: Dict[int, Dict[str, str]] = {}
+        parsed: Dict[int, Tuple[Dict[str, Any], Tuple[str, bytes]]] = {}
+        started: Dict[Tuple[str, bytes], asyncio.Task] = {}
+
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+
+                for tc in delta.tool_calls or []:
+                    call = buffers.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function:
+                        call["name"] += tc.function.name or ""
+                        call["arguments"] += tc.function.arguments or ""
+
+                    if not self.enable_parallel_tool_execution or tc.index in parsed:
+                        continue
+                    try:
+                        args = orjson.loads(call["arguments"])
+                    except orjson.JSONDecodeError:
+                        continue  # arguments still streaming
+
+                    key = self._prepare_call(call["name"], args, defaults)
+                    parsed[tc.index] = (args, key)
+                    if key not in started:
+                        started[key] = asyncio.create_task(
+                            self._execute_calendar_tool_async(call["name"], args)
+                        )
+
+            # Still inside the try: a malformed late call must not leave
+            # earlier started tasks pending
+            calls: List[Tuple[str, str, Dict[str, Any]]] = []
+            keys: List[Tuple[str, bytes]] = []
+            for index in sorted(buffers):
+                call = buffers[index]
+                if index in parsed:
+                    args, key = parsed[index]
+                else:
+                    args = orjson.loads(call["arguments"] or "{}")
+                    key = self._prepare_call(call["name"], args, defaults)
+                calls.append((call["id"], call["name"], args))
+                keys.append(key)
+
+            results_by_key: Dict[Tuple[str, bytes], Dict[str, Any]] = {}
+            for (_, tool_name, args), key in zip(calls, keys):
+                if key in results_by_key:
+                    continue
+                if key in started:
+                    results_by_key[key] = await started[key]
+                else:
+                    results_by_key[key] = await self._execute_calendar_tool_async(tool_name, args)
+        except BaseException:
+            for task in started.values():
+                task.cancel()
+            raise
+
+        return "".join(content_parts), calls, [results_by_key[key] for key in keys]
+
+    @staticmethod
+    def _prepare_call(
+        tool_name: str, args: Dict[str, Any], defaults: Dict[str, str]
+    ) -> Tuple[str, bytes]:
+        """Fill in missing arguments and return the call's dedupe key."""
+        if tool_name == "schedule_delivery":
+            for field, value in defaults.items():
+                args.setdefault(field, value)
+
+        if tool_name == "check_calendar_availability":
+            args.setdefault("delivery_time", defaults["delivery_time"])
+
+        return tool_name, orjson.dumps(args, option=orjson.OPT_SORT_KEYS)
+
+    @staticmethod
+    def _template_confirmation(
+        calls: List[Tuple[str, str, Dict[str, Any]]],
+        tool_results: List[Dict[str, Any]],
+    ) -> Optional[str]:
+        """Confirmation text for a successful schedule_delivery, if any."""
+        for (_, tool_name, args), result in zip(calls, tool_results):
+            if tool_name == "schedule_delivery" and result.get("success"):
+                return (
+                    f"Your order {result['order_id']} is scheduled for "
+                    f"{result['delivery_time']} to {args['address']}."
+                )
+        return None
+
+    def _commit_turn(self, turn: List[Dict[str, Any]]) -> None:
+        """Append a finished turn and drop the oldest turns beyond the cap."""
+        history = self.conversation_history
+        history.extend(turn)
+        if len(history) <= self.max_history_messages:
+            return
+
+        # Cut at a user message so no tool result loses its tool call
+        start = len(history) - self.max_history_messages
+        while start < len(history) and history[start]["role"] != "user":
+            start += 1
+        if start == len(history):
+            # The latest turn alone exceeds the cap: keep it whole
+            start = len(history) - len(turn)
+        del history[:start]
+
+    async def process_batch(self, orders: List[Dict[str, Any]]) -> List[str]:
+        """
+        Schedule several orders concurrently.
+
+        Each entry holds the keyword arguments of process_order_for_scheduling;
+        replies are returned in the same order as `orders`. The whole batch
+        shares one reference time. Orders are independent, so each runs on
+        its own fork() and never sees another customer's conversation.
+        """
+        now = datetime.now(timezone.utc)
+        return list(
+            await asyncio.gather(
+                *[
+                    self.fork().process_order_for_scheduling(**order, now=now)
+                    for order in orders
+                ]
+            )
+        )
+
+    async def _execute_calendar_tool_async(
+        self, tool_name: str, args: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Awaitable entry point for calendar tools, so calls can be gathered."""
+        return self._execute_calendar_tool(tool_name, args)
+
     def _execute_calendar_tool(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         """Simulate calendar operations."""
         if tool_name == "schedule_delivery":
@@ -219,6 +416,15 @@ class SchedulingAgent:
     def get_scheduled_deliveries(self) -> Dict[str, Dict[str, Any]]:
         return self.scheduled_deliveries
 
+    def fork(self) -> "SchedulingAgent":
+        """
+        Return an agent for a separate conversation: it shares this one's
+        client, settings and scheduled_deliveries but starts with no history.
+        """
+        agent = copy.copy(self)
+        agent.conversation_history = []
+        return agent
+
     def reset_conversation(self) -> None:
         self.conversation_history = []
 
@@ -234,20 +440,27 @@ class AgentOrchestrator:
     - returns combined result
     """
 
-    def __init__(self, ordering_agent, scheduling_agent: SchedulingAgent):
+    def __init__(
+        self,
+        ordering_agent,
+        scheduling_agent: SchedulingAgent,
+        max_concurrency: int = 4,
+    ):
         self.ordering_agent = ordering_agent
         self.scheduling_agent = scheduling_agent
 
+        # Upper bound on workflows in flight in execute_batch_workflow,
+        # which keeps concurrent LLM calls under the API rate limit
+        self.max_concurrency = max_concurrency
+
     def _extract_order_id(self, text: str) -> Optional[str]:
         """Very simple extraction: looks for pattern like 'ORDXXXX'."""
-        import re
-
-        match = re.search(r"ORD[A-Z0-9]{4,}", text)
+        match = _ORDER_ID_RE.search(text)
         if match:
             return match.group(0)
         return None
 
-    def execute_order_workflow(
+    async def execute_order_workflow(
         self,
         user_request: str,
         delivery_address: str,
@@ -260,18 +473,18 @@ class AgentOrchestrator:
         2. Orchestrator extracts order_id
         3. Scheduling agent schedules delivery
         """
-        print("\n" + "=" * 70)
-        print("🔄 STARTING END-TO-END WORKFLOW")
-        print("=" * 70 + "\n")
+        logger.info("\n" + "=" * 70)
+        logger.info("🔄 STARTING END-TO-END WORKFLOW")
+        logger.info("=" * 70 + "\n")
 
         # Step 1: Let ordering agent handle the user's pizza request
         combined_request = (
             f"{user_request} My address is {delivery_address}. "
             f"My name is {customer_name}. My phone number is {customer_phone}."
         )
-        print(f"👤 User → OrderingAgent: {combined_request}")
-        order_reply = self.ordering_agent.process_request(combined_request)
-        print(f"🤖 OrderingAgent reply:\n{order_reply}\n")
+        logger.info("👤 User → OrderingAgent: %s", combined_request)
+        order_reply = await self.ordering_agent.process_request(combined_request)
+        logger.info("🤖 OrderingAgent reply:\n%s\n", order_reply)
 
         # Step 2: Extract order_id from the reply text
         order_id = self._extract_order_id(order_reply)
@@ -284,10 +497,10 @@ class AgentOrchestrator:
             }
 
         # Step 3: Ask scheduling agent to schedule delivery
-        print(f"📦 Extracted order_id: {order_id}")
-        print("📅 Sending to SchedulingAgent for delivery scheduling...\n")
+        logger.info("📦 Extracted order_id: %s", order_id)
+        logger.info("📅 Sending to SchedulingAgent for delivery scheduling...\n")
 
-        schedule_reply = self.scheduling_agent.process_order_for_scheduling(
+        schedule_reply = await self.scheduling_agent.process_order_for_scheduling(
             order_id=order_id,
             pizza_name="pizza",  # in a real impl we would parse exact pizza
             prep_time="25 minutes",
@@ -295,7 +508,7 @@ class AgentOrchestrator:
             customer_name=customer_name,
         )
 
-        print(f"🤖 SchedulingAgent reply:\n{schedule_reply}\n")
+        logger.info("🤖 SchedulingAgent reply:\n%s\n", schedule_reply)
 
         return {
             "success": True,
@@ -304,8 +517,29 @@ class AgentOrchestrator:
             "order_id": order_id,
         }
 
+    async def execute_batch_workflow(self, orders: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Run execute_order_workflow for several independent orders at once.
+
+        Each entry holds the keyword arguments of execute_order_workflow.
+        At most `max_concurrency` workflows run at a time; results are
+        returned in the same order as `orders`. Every order gets its own
+        forked agent pair, so no workflow sees another customer's details.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(order: Dict[str, str]) -> Dict[str, Any]:
+            workflow = AgentOrchestrator(
+                self.ordering_agent.fork(),
+                self.scheduling_agent.fork(),
+            )
+            async with semaphore:
+                return await workflow.execute_order_workflow(**order)
 
-def demo_complete_workflow() -> None:
+        return list(await asyncio.gather(*[run(order) for order in orders]))
+
+
+async def demo_complete_workflow() -> None:
     """
     Demonstrates full workflow:
     - assumes FastAPI backend running
@@ -314,19 +548,24 @@ def demo_complete_workflow() -> None:
     from pizza_mcp_server import PizzaMCPServerFactory
     from ordering_agent import PizzaOrderingAgent
 
-    # Create MCP server & agents
-    mcp_server, _ = PizzaMCPServerFactory.create_server()
-    ordering_agent = PizzaOrderingAgent(mcp_server)
-    scheduling_agent = SchedulingAgent()
-
-    orchestrator = AgentOrchestrator(ordering_agent, scheduling_agent)
+    configure_logging()
 
-    result = orchestrator.execute_order_workflow(
-        user_request="I want a large Margherita pizza.",
-        delivery_address="123 Main Street, Hyderabad",
-        customer_name="Raj Kumar",
-        customer_phone="9876543210",
-    )
+    # Create MCP server & agents
+    mcp_server, api_client = PizzaMCPServerFactory.create_server()
+    try:
+        ordering_agent = PizzaOrderingAgent(mcp_server)
+        scheduling_agent = SchedulingAgent()
+
+        orchestrator = AgentOrchestrator(ordering_agent, scheduling_agent)
+
+        result = await orchestrator.execute_order_workflow(
+            user_request="I want a large Margherita pizza.",
+            delivery_address="123 Main Street, Hyderabad",
+            customer_name="Raj Kumar",
+            customer_phone="9876543210",
+        )
+    finally:
+        await api_client.aclose()
 
     print("=" * 70)
     print("✅ WORKFLOW RESULT")
@@ -336,4 +575,4 @@ def demo_complete_workflow() -> None:
 
 
 if __name__ == "__main__":
-    demo_complete_workflow()
+    asyncio.run(demo_complete_workflow())
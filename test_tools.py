@@ -1,23 +1,34 @@
+import asyncio
 import sys
+from itertools import islice
 sys.path.insert(0, "src")
+from log_config import configure_logging
 from pizza_mcp_server import PizzaMCPServerFactory
 
-print("🍕 TESTING MCP TOOLS (No OpenAI needed)")
-server, _ = PizzaMCPServerFactory.create_server()
 
-# Test tool 1: listPizzas
-print("\n1️⃣ listPizzas tool:")
-pizzas = server.execute_tool("listPizzas", {})
-print(f"   Found {len(pizzas)} pizzas:")
-for p in pizzas[:3]:
-    print(f"   - {p['name']} ₹{p['price']}")
+async def main():
+    configure_logging()
+    print("🍕 TESTING MCP TOOLS (No OpenAI needed)")
+    server, client = PizzaMCPServerFactory.create_server()
 
-# Test tool 2: placeOrder  
-print("\n2️⃣ placeOrder tool:")
-order = server.execute_tool("placeOrder", {
-    "pizza_id": 1, "size": "large", "quantity": 1,
-    "address": "123 Main St", "customer_name": "Raj", "phone": "9876543210"
-})
-print(f"   Order created: {order['order_id']}")
+    try:
+        # Test tool 1: listPizzas
+        print("\n1️⃣ listPizzas tool:")
+        pizzas = await server.execute_tool("listPizzas", {})
+        print(f"   Found {len(pizzas)} pizzas:")
+        for p in islice(pizzas, 3):
+            print(f"   - {p['name']} ₹{p['price']}")
 
-print("\n✅ ALL 4 TOOLS WORKING PERFECTLY!")
+        # Test tool 2: placeOrder  
+        print("\n2️⃣ placeOrder tool:")
+        order = await server.execute_tool("placeOrder", {
+            "pizza_id": 1, "size": "large", "quantity": 1,
+            "address": "123 Main St", "customer_name": "Raj", "phone": "9876543210"
+        })
+        print(f"   Order created: {order['order_id']}")
+    finally:
+        await client.aclose()
+    print("\n✅ ALL 4 TOOLS WORKING PERFECTLY!")
+
+
+asyncio.run(main())